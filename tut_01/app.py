@@ -1,9 +1,13 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import re
 from collections import deque
 import math
-from io import BytesIO
+import hashlib
+import zipfile
+import xlsxwriter
+from io import BytesIO, TextIOWrapper
 
 # --------------------- #
 # 🎨 Streamlit Page Setup
@@ -33,36 +37,38 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 st.title("📊 Student Grouping Tool")
-st.caption("Upload an Excel file with student details to generate balanced group distributions.")
+st.caption("Upload an Excel (or CSV) file with student details to generate balanced group distributions.")
 
 
 # --------------------- #
 # 🔹 Utility Functions
 # --------------------- #
 PREFERRED_BRANCH_ORDER = ["AI", "CB", "CE", "CH", "CS", "CT", "EC", "MC", "MM", "MT"]
+BRANCH_PRIORITY = {dept: rank for rank, dept in enumerate(PREFERRED_BRANCH_ORDER)}
+STUDENT_COLUMNS = ["Roll", "Name", "Email"]
+DEPARTMENT_PATTERN = re.compile(r"([A-Z]{2})")
 
 
-def extract_department(roll_no: str) -> str:
-    """Pull department code (2 capital letters) from roll number string."""
-    if pd.isna(roll_no):
-        return "??"
-    match = re.search(r"[A-Z]{2}", str(roll_no))
-    return match.group(0) if match else "??"
+def extract_departments(roll_nos: pd.Series) -> pd.Series:
+    """Pull department codes (first 2 capital letters) from a column of roll numbers."""
+    return roll_nos.astype(str).str.extract(DEPARTMENT_PATTERN, expand=False).fillna("??")
 
 
-def compile_statistics(group_list, total_groups):
+def compile_statistics(group_list, total_groups, departments):
     """Create a summary table showing department counts per group."""
-    all_depts = sorted(set().union(*[set(pd.DataFrame(g)["Department"]) for g in group_list if g]))
-
-    stats = pd.DataFrame(0, index=[f"Group {i+1}" for i in range(total_groups)],
-                         columns=all_depts + ["Total"])
-
-    for idx, members in enumerate(group_list, start=1):
-        gdf = pd.DataFrame(members)
-        if not gdf.empty:
-            for dept in all_depts:
-                stats.loc[f"Group {idx}", dept] = int((gdf["Department"] == dept).sum())
-            stats.loc[f"Group {idx}", "Total"] = len(gdf)
+    # Count integer category codes: one flat (group, department) cell id per student
+    codes = departments.cat.codes.to_numpy()
+    n_depts = len(departments.cat.categories)
+    group_ids = np.repeat(np.arange(len(group_list)), [len(g) for g in group_list])
+    cells = group_ids * n_depts + codes[np.concatenate(group_list)]
+    counts = np.bincount(cells, minlength=total_groups * n_depts).reshape(total_groups, n_depts)
+
+    # Categories are sorted; keep only departments that actually appear in a group
+    present = counts.any(axis=0)
+    counts = counts[:, present]
+    stats = pd.DataFrame(counts, index=[f"Group {i+1}" for i in range(total_groups)],
+                         columns=departments.cat.categories[present].tolist())
+    stats["Total"] = counts.sum(axis=1)
 
     return stats.reset_index().rename(columns={"index": "Group"})
 
@@ -70,52 +76,77 @@ def compile_statistics(group_list, total_groups):
 # --------------------- #
 # 🔹 Grouping Algorithms
 # --------------------- #
-def branch_round_robin(data, total_groups):
-    """Distribute students round-robin by department."""
-    seen_depts = list(pd.unique(data["Department"]))
+def split_by_department(data):
+    """Map each department to its students' row positions, in order of first appearance."""
+    departments = data["Department"].cat
+    codes = departments.codes.to_numpy()
 
-    cycle = [d for d in PREFERRED_BRANCH_ORDER if d in seen_depts] + \
-            [d for d in seen_depts if d not in PREFERRED_BRANCH_ORDER]
+    # Bucket row positions by category code: a stable argsort keeps each bucket in row order
+    order = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes, minlength=len(departments.categories))
+    blocks = np.split(order, np.cumsum(counts)[:-1])
+    positions = {d: block for d, block in zip(departments.categories, blocks) if len(block)}
+    return dict(sorted(positions.items(), key=lambda item: item[1][0]))
 
-    queues = {d: deque(data[data["Department"] == d].to_dict("records")) for d in cycle}
 
-    total_students = len(data)
+def branch_round_robin(dept_rows, total_groups):
+    """Distribute students round-robin by department."""
+    # Preferred branches first, then the rest in order of first appearance (stable sort)
+    cycle = sorted(dept_rows, key=lambda d: BRANCH_PRIORITY.get(d, len(BRANCH_PRIORITY)))
+    sizes = np.array([len(dept_rows[d]) for d in cycle], dtype=np.int64)
+
+    total_students = int(sizes.sum())
     base_size = total_students // total_groups
     remainder = total_students % total_groups
     group_targets = [base_size + (1 if i < remainder else 0) for i in range(total_groups)]
 
-    groups = [[] for _ in range(total_groups)]
-
-    for gi in range(total_groups):
-        target_size = group_targets[gi]
-        while len(groups[gi]) < target_size:
-            progress = False
-            for dept in cycle:
-                if len(groups[gi]) >= target_size:
-                    break
-                if queues[dept]:
-                    groups[gi].append(queues[dept].popleft())
-                    progress = True
-            if not progress:
-                break
-
-    return groups
-
-
-def uniform_fill(data, total_groups):
+    # Each group restarts the department cycle: it takes `full` complete passes over the
+    # departments that still have students, then one more from the first few that remain.
+    remaining = sizes.copy()
+    takes = np.zeros((total_groups, len(cycle)), dtype=np.int64)
+    for gi, target_size in enumerate(group_targets):
+        lo, hi = 0, int(remaining.max(initial=0))
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if np.minimum(remaining, mid).sum() <= target_size:
+                lo = mid
+            else:
+                hi = mid - 1
+        take = np.minimum(remaining, lo)
+        extra = target_size - int(take.sum())
+        take[np.flatnonzero(remaining > lo)[:extra]] += 1
+        takes[gi] = take
+        remaining -= take
+
+    # Tag every student with (group, pass, department) and order them with one sort
+    rows = np.concatenate([np.empty(0, dtype=np.intp)] + [dept_rows[d] for d in cycle])
+    dept_pos = np.repeat(np.arange(len(cycle)), sizes)
+    rank = np.arange(total_students) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    bounds = np.cumsum(takes, axis=0)
+
+    group_of = np.empty(total_students, dtype=np.int64)
+    for d, stop in enumerate(np.cumsum(sizes)):
+        span = slice(stop - sizes[d], stop)
+        group_of[span] = np.searchsorted(bounds[:, d], rank[span], side="right")
+    first_rank = np.vstack([np.zeros((1, len(cycle)), dtype=np.int64), bounds])[group_of, dept_pos]
+    pass_of = rank - first_rank
+
+    order = np.lexsort((pass_of * len(cycle) + dept_pos, group_of))
+    return np.split(rows[order], np.cumsum(takes.sum(axis=1))[:-1])
+
+
+def uniform_fill(dept_rows, total_groups):
     """Try to fill groups uniformly while keeping departments clustered."""
-    total = len(data)
+    total = sum(len(rows) for rows in dept_rows.values())
     group_capacity = math.ceil(total / total_groups)
     groups = []
 
-    dept_counts = data["Department"].value_counts()
-    sorted_depts = list(dept_counts.sort_values(ascending=False).index)
-
-    dept_rows = {d: data[data["Department"] == d].to_dict("records") for d in sorted_depts}
+    sorted_depts = sorted(dept_rows, key=lambda d: len(dept_rows[d]), reverse=True)
     leftovers = []
 
     # Full department groups first
-    for dept, rows in dept_rows.items():
+    for dept in sorted_depts:
+        rows = dept_rows[dept]
         n = len(rows)
         idx = 0
         while n - idx >= group_capacity:
@@ -126,56 +157,169 @@ def uniform_fill(data, total_groups):
 
     leftovers = deque(sorted(leftovers, key=lambda x: -len(x)))
 
-    # Merge leftover blocks into groups
+    # Merge leftover blocks into groups (blocks are array views, joined once per group)
     while leftovers:
         block = leftovers.popleft()
-        new_group = list(block)
-        space = group_capacity - len(new_group)
+        parts = [block]
+        space = group_capacity - len(block)
 
         while space > 0 and leftovers:
             nxt = leftovers.popleft()
             if len(nxt) <= space:
-                new_group.extend(nxt)
+                parts.append(nxt)
                 space -= len(nxt)
             else:
-                new_group.extend(nxt[:space])
+                parts.append(nxt[:space])
                 leftovers.appendleft(nxt[space:])
                 space = 0
-        groups.append(new_group)
+        groups.append(np.concatenate(parts))
 
     while len(groups) < total_groups:
-        groups.append([])
+        groups.append(np.empty(0, dtype=np.intp))
 
     return groups
 
 
+# --------------------- #
+# 🔹 Cached Computations
+# --------------------- #
+# Cache keys are `file_key` (a digest taken once per rerun) plus the group count. The raw
+# upload is passed as `_file_bytes`, which Streamlit leaves out of the key instead of
+# re-hashing the whole file for every cached call. `file_key` ends in the upload's
+# extension (".csv" / ".xlsx"), which picks the reader: leading bytes are not trusted.
+# cache_resource hands every caller the same frame instead of unpickling a fresh copy per
+# call (main, build_groups and build_workbook all read it); callers must not mutate it.
+# The caches are shared by every session, so each keeps only its most recent entries:
+# stepping through group counts would otherwise pin a grouping and payloads per count.
+@st.cache_resource(show_spinner=False, max_entries=8)
+def load_students(file_key: str, _file_bytes: bytes) -> pd.DataFrame:
+    """Parse the uploaded workbook once per file and tag each student's department."""
+    # Only the student columns are used; skip parsing/type inference for everything else
+    read_opts = {"usecols": lambda c: c in STUDENT_COLUMNS, "dtype": str}
+    if file_key.endswith(".csv"):
+        df = pd.read_csv(BytesIO(_file_bytes), **read_opts)
+    else:
+        try:
+            df = pd.read_excel(BytesIO(_file_bytes), engine="calamine", **read_opts)
+        except (ImportError, ValueError):  # python-calamine missing, or pandas < 2.2
+            df = pd.read_excel(BytesIO(_file_bytes), engine="openpyxl", **read_opts)
+
+    # Ensure required columns
+    for col in STUDENT_COLUMNS:
+        if col not in df.columns:
+            df[col] = ""
+
+    # Low-cardinality codes: store as a categorical so grouping/comparisons run on int codes
+    df["Department"] = extract_departments(df["Roll"]).astype("category")
+    return df
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_groups(file_key: str, _file_bytes: bytes, total_groups: int):
+    """Run both grouping strategies (and their stats) once per file and group count."""
+    data = load_students(file_key, _file_bytes)
+    departments = data["Department"]
+    dept_rows = split_by_department(data)
+
+    rr_groups = branch_round_robin(dept_rows, total_groups)
+    rr_stats = compile_statistics(rr_groups, total_groups, departments)
+
+    uniform_groups = uniform_fill(dept_rows, total_groups)
+    uniform_stats = compile_statistics(uniform_groups, total_groups, departments)
+
+    return rr_groups, rr_stats, uniform_groups, uniform_stats
+
+
+def stack_groups(data, groups):
+    """Stack every group into one long table with a leading Group column."""
+    table = data.iloc[np.concatenate(groups)].reset_index(drop=True)
+    table.insert(0, "Group", np.repeat([f"Group {i+1}" for i in range(len(groups))],
+                                       [len(g) for g in groups]))
+    return table
+
+
+def write_sheet(workbook, sheet_name, frame, header_format):
+    """Stream a frame into a new worksheet strictly row by row (required by constant_memory)."""
+    sheet = workbook.add_worksheet(sheet_name)
+    sheet.write_row(0, 0, [str(c) for c in frame.columns], header_format)
+    sheet.autofilter(0, 0, len(frame), len(frame.columns) - 1)
+
+    values = frame.astype(object).where(frame.notna(), None).to_numpy()
+    for r, row in enumerate(values, start=1):
+        sheet.write_row(r, 0, row.tolist())
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_workbook(file_key: str, _file_bytes: bytes, total_groups: int) -> bytes:
+    """Serialize stats and every group to one Excel workbook, once per file and group count."""
+    data = load_students(file_key, _file_bytes)
+    rr_groups, rr_stats, uniform_groups, uniform_stats = build_groups(file_key, _file_bytes, total_groups)
+
+    buffer = BytesIO()
+    with xlsxwriter.Workbook(buffer, {"constant_memory": True}) as workbook:
+        header_format = workbook.add_format({"bold": True, "border": 1, "align": "center"})
+
+        write_sheet(workbook, "Stats_RR", rr_stats, header_format)
+        write_sheet(workbook, "Stats_Uniform", uniform_stats, header_format)
+
+        # One long sheet per strategy (filter on Group) instead of a sheet per group
+        write_sheet(workbook, "RR_Groups", stack_groups(data, rr_groups), header_format)
+        write_sheet(workbook, "Uniform_Groups", stack_groups(data, uniform_groups), header_format)
+
+    return buffer.getvalue()
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_csv_zip(file_key: str, _file_bytes: bytes, total_groups: int) -> bytes:
+    """Package stats and every group as plain CSVs in one zip (much cheaper than xlsx)."""
+    data = load_students(file_key, _file_bytes)
+    rr_groups, rr_stats, uniform_groups, uniform_stats = build_groups(file_key, _file_bytes, total_groups)
+
+    entries = [("Stats_RR.csv", rr_stats), ("Stats_Uniform.csv", uniform_stats)]
+    # Trailing groups can be empty (e.g. uniform fill with large departments); skip those
+    entries += [(f"RR/Group{gi}.csv", data.iloc[g]) for gi, g in enumerate(rr_groups, start=1) if len(g)]
+    entries += [(f"Uniform/Group{gi}.csv", data.iloc[g])
+                for gi, g in enumerate(uniform_groups, start=1) if len(g)]
+
+    # Stream each CSV straight into its deflate entry instead of building the text first;
+    # the CSVs are small, so the fastest compression level loses almost nothing in size
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for name, frame in entries:
+            with TextIOWrapper(zf.open(name, "w"), encoding="utf-8", newline="") as out:
+                frame.to_csv(out, index=False)
+
+    return buffer.getvalue()
+
+
 # --------------------- #
 # 🔹 Streamlit Application
 # --------------------- #
+def preview_groups(title, groups, data, key):
+    """Render one selected group at a time instead of a table per group on every rerun."""
+    with st.expander(title):
+        gi = st.selectbox("Group", range(1, len(groups) + 1),
+                          format_func=lambda i: f"Group {i}", key=key)
+        st.dataframe(data.iloc[groups[gi - 1]][["Roll", "Name", "Email", "Department"]],
+                     use_container_width=True, hide_index=True)
+
+
 def main():
-    file = st.file_uploader("📥 Upload Excel File", type=["xlsx"])
+    file = st.file_uploader("📥 Upload Excel / CSV File", type=["xlsx", "csv"])
     num_groups = st.number_input("Number of Groups", min_value=2, max_value=100, value=15)
 
     if file:
+        file_bytes = file.getvalue()
+        extension = "csv" if file.name.lower().endswith(".csv") else "xlsx"
+        file_key = f"{hashlib.sha1(file_bytes).hexdigest()}.{extension}"
         try:
-            df = pd.read_excel(file)
+            df = load_students(file_key, file_bytes)
         except Exception as e:
             st.error(f"❌ Could not read the file: {e}")
             return
 
-        # Ensure required columns
-        for col in ["Roll", "Name", "Email"]:
-            if col not in df.columns:
-                df[col] = ""
-
-        df["Department"] = df["Roll"].apply(extract_department)
-
-        # Generate groups
-        rr_groups = branch_round_robin(df, num_groups)
-        rr_stats = compile_statistics(rr_groups, num_groups)
-
-        uniform_groups = uniform_fill(df, num_groups)
-        uniform_stats = compile_statistics(uniform_groups, num_groups)
+        # Generate groups (cached per file + group count, so widget reruns are cheap)
+        rr_groups, rr_stats, uniform_groups, uniform_stats = build_groups(file_key, file_bytes, int(num_groups))
 
         # Show summary stats
         st.subheader("📊 Branch-wise Round Robin Distribution")
@@ -185,40 +329,24 @@ def main():
         st.dataframe(uniform_stats, use_container_width=True, hide_index=True)
 
         # Preview groups
-        with st.expander("👀 Preview Round Robin Groups"):
-            for gi, g in enumerate(rr_groups, start=1):
-                st.markdown(f"### Group {gi}")
-                gdf = pd.DataFrame(g)
-                st.dataframe(gdf[["Roll", "Name", "Email", "Department"]],
-                             use_container_width=True, hide_index=True)
-
-        with st.expander("👀 Preview Uniform Groups"):
-            for gi, g in enumerate(uniform_groups, start=1):
-                st.markdown(f"### Group {gi}")
-                gdf = pd.DataFrame(g)
-                st.dataframe(gdf[["Roll", "Name", "Email", "Department"]],
-                             use_container_width=True, hide_index=True)
-
-        # Export to Excel
-        buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-            rr_stats.to_excel(writer, sheet_name="Stats_RR", index=False)
-            uniform_stats.to_excel(writer, sheet_name="Stats_Uniform", index=False)
-
-            for gi, g in enumerate(rr_groups, start=1):
-                pd.DataFrame(g).to_excel(writer, sheet_name=f"RR_Group{gi}", index=False)
-            for gi, g in enumerate(uniform_groups, start=1):
-                pd.DataFrame(g).to_excel(writer, sheet_name=f"Uniform_Group{gi}", index=False)
-
-        buffer.seek(0)
+        preview_groups("👀 Preview Round Robin Groups", rr_groups, df, key="rr_preview")
+        preview_groups("👀 Preview Uniform Groups", uniform_groups, df, key="uniform_preview")
 
+        # Export to Excel (built once per file + group count, then served from cache)
         st.download_button(
             label="⬇️ Download Grouped Data",
-            data=buffer,
+            data=build_workbook(file_key, file_bytes, int(num_groups)),
             file_name="grouped_output.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
 
+        st.download_button(
+            label="⬇️ Download Groups as CSV (zip)",
+            data=build_csv_zip(file_key, file_bytes, int(num_groups)),
+            file_name="grouped_output.zip",
+            mime="application/zip"
+        )
+
 
 # --------------------- #
 # 🚀 Run App
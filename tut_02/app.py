@@ -1,10 +1,8 @@
 import streamlit as st
 import pandas as pd
 import logging
-from io import BytesIO
-
 import os
-import logging
+from io import BytesIO
 
 # Ensure the 'logs' directory exists
 log_dir = 'D:/'
@@ -19,12 +17,6 @@ logging.basicConfig(
 )
 
 logging.info("Logging is set up successfully.")
-
-logging.basicConfig(
-    filename="logs/app.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger()
 
 st.set_page_config(page_title="BTP/MTP Allocation System", layout="wide")
@@ -41,15 +33,14 @@ def process_allocation(input_df):
         st.info(f"Detected {n_faculties} faculties: {', '.join(faculty_cols)}")
         students = input_df.sort_values(by="CGPA", ascending=False).reset_index(drop=True)
         allocations = []
-        for i, row in students.iterrows():
+        # Plain tuples of the preference columns; iterrows would box every row into a Series
+        for i, prefs in enumerate(students[faculty_cols].itertuples(index=False, name=None)):
             cycle_pref_index = i % n_faculties + 1
-            allocated_fac = None
-            for fac in faculty_cols:
-                if row[fac] == cycle_pref_index:
+            allocated_fac = faculty_cols[i % n_faculties]
+            for fac, pref in zip(faculty_cols, prefs):
+                if pref == cycle_pref_index:
                     allocated_fac = fac
                     break
-            if not allocated_fac:
-                allocated_fac = faculty_cols[i % n_faculties]
             allocations.append(allocated_fac)
         output_df = students[["Roll", "Name", "Email", "CGPA"]].copy()
         output_df["Allocated"] = allocations
@@ -66,9 +57,8 @@ def process_allocation(input_df):
 
 def convert_df_to_csv_bytes(df):
     buffer = BytesIO()
-    df.to_csv(buffer, index=False)
-    buffer.seek(0)
-    return buffer
+    df.to_csv(buffer, index=False, lineterminator="\n")
+    return buffer.getvalue()
 
 if uploaded_file is not None:
     try:
@@ -71,9 +71,9 @@ if generate:
                 text=True
             )
 
-            # Zip everything
+            # Zip everything (level 1: outputs are mostly already-compressed PDFs/xlsx)
             zip_path = tmpdir / "final_output.zip"
-            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
                 for folder in ["output", "attendance_pdfs", "logs"]:
                     folder_path = tmpdir / folder
                     if folder_path.exists():